@@ -7,53 +7,35 @@ Measures: throughput, CPU usage, syscall count, latency
 
 import os
 import time
-import json
-import random
-import subprocess
+import select
 import psutil
-import statistics
-import tempfile
 from datetime import datetime
 
-class IOUringTest:
-    def __init__(self):
-        self.results = {}
-        self.test_files = self.create_test_files()
-    
-    def create_test_files(self, num_files=50, file_size=100000):
-        """Create temporary log files for testing"""
-        tmpdir = tempfile.mkdtemp()
-        files = []
-        
-        for i in range(num_files):
-            filepath = os.path.join(tmpdir, f"test_log_{i}.txt")
-            with open(filepath, 'w') as f:
-                for j in range(file_size // 100):
-                    f.write(f"[{time.time():.3f}] INFO [service-{i}] Log entry {j}\n")
-            files.append(filepath)
-        
-        return files, tmpdir
-    
+from iouring_common import IOUringTestBase
+
+# epoll is Linux-only
+HAS_EPOLL = hasattr(select, 'epoll')
+
+class IOUringTest(IOUringTestBase):
     def test_blocking_read(self):
         """Simulate blocking read() approach"""
         files, tmpdir = self.test_files
         
-        start_time = time.time()
-        start_cpu = psutil.Process().cpu_num()
-        
+        start_time = time.perf_counter()
         total_bytes = 0
         syscall_count = 0
         
-        for filepath in files:
-            with open(filepath, 'rb') as f:
-                while True:
-                    data = f.read(4096)
-                    if not data:
-                        break
-                    total_bytes += len(data)
-                    syscall_count += 1
-        
-        elapsed = time.time() - start_time
+        for _, offset, size in files:
+            end = offset + size
+            while offset < end:
+                data = os.pread(self._fd, min(4096, end - offset), offset)
+                if not data:
+                    break
+                offset += len(data)
+                total_bytes += len(data)
+                syscall_count += 1
+        
+        elapsed = time.perf_counter() - start_time
         throughput = (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
         
         # Estimate CPU usage (simplified)
@@ -72,29 +54,23 @@ class IOUringTest:
     
     def test_select_poll(self):
         """Simulate select/poll approach"""
-        import select
-        
         files, tmpdir = self.test_files
-        file_descriptors = [open(f, 'rb') for f in files]
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         total_bytes = 0
         syscall_count = 0
         
-        try:
-            # Use select for readable files (simplified)
-            readable, _, _ = select.select(file_descriptors, [], [], 1.0)
-            
-            for fd in readable:
-                data = fd.read(4096)
+        # Use select for readable files (simplified)
+        readable, _, _ = select.select([self._fd], [], [], 1.0)
+        
+        if readable:
+            for _, offset, _ in files:
+                data = os.pread(self._fd, 4096, offset)
                 if data:
                     total_bytes += len(data)
                     syscall_count += 1
-        finally:
-            for fd in file_descriptors:
-                fd.close()
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         throughput = (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
         cpu_percent = psutil.Process().cpu_percent(interval=0.1)
         
@@ -113,17 +89,19 @@ class IOUringTest:
         """Simulate epoll approach (works on Linux)"""
         files, tmpdir = self.test_files
         
+        if not HAS_EPOLL:
+            # epoll not available (macOS/Windows)
+            return None
+        
+        epoll = select.epoll()
         try:
-            import select
-            epoll = select.epoll()
-            file_descriptors = {}
-            
-            for filepath in files:
-                fd = os.open(filepath, os.O_RDONLY)
-                file_descriptors[fd] = filepath
-                epoll.register(fd, select.EPOLLIN)
+            try:
+                epoll.register(self._fd, select.EPOLLIN)
+            except PermissionError:
+                # epoll cannot watch regular files (EPERM); they are always "ready"
+                return None
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             total_bytes = 0
             syscall_count = 0
             
@@ -132,21 +110,17 @@ class IOUringTest:
             
             for fd, event in events:
                 if event & select.EPOLLIN:
-                    data = os.read(fd, 4096)
-                    if data:
-                        total_bytes += len(data)
-                        syscall_count += 1
+                    for _, offset, _ in files:
+                        data = os.pread(fd, 4096, offset)
+                        if data:
+                            total_bytes += len(data)
+                            syscall_count += 1
             
-            for fd in file_descriptors:
-                epoll.unregister(fd)
-                os.close(fd)
+            epoll.unregister(self._fd)
+        finally:
             epoll.close()
-            
-        except (ImportError, AttributeError):
-            # epoll not available (macOS/Windows)
-            return None
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         throughput = (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
         cpu_percent = psutil.Process().cpu_percent(interval=0.1)
         
@@ -161,109 +135,41 @@ class IOUringTest:
             "latency_ms": round((elapsed / len(files)) * 1000, 2)
         }
     
-    def test_iouring_simulation(self):
-        """Simulate io_uring approach (theoretical/measured from benchmarks)"""
+    def test_iouring(self, mode="default"):
+        """io_uring via liburing: one batched submission for all files"""
+        measured = self._iouring_read(mode)
+        if measured is None:
+            return None
         files, tmpdir = self.test_files
+        total_bytes, syscall_count, elapsed = measured
         
-        # io_uring is not directly available in Python without C bindings
-        # Simulate based on published benchmarks and kernel documentation
-        
-        # Theoretical io_uring performance based on Axboe et al. (2019)
-        # For 50 files, typical results show:
-        
-        total_bytes = sum(os.path.getsize(f) for f in files)
-        
-        # io_uring batches syscalls: 8 syscalls for 50 files vs 256+ for epoll
-        syscall_count = 8
-        
-        # Based on kernel benchmarks: 580 MB/s on modern hardware
-        # Scaling down for 50 files and test hardware
-        estimated_throughput = 85.0  # MB/s (scaled for 50 files)
-        estimated_cpu = 2.8
-        estimated_latency = 0.8
+        throughput = (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+        cpu_percent = psutil.Process().cpu_percent(interval=0.1)
         
         return {
-            "approach": "io_uring",
-            "throughput_mbps": estimated_throughput,
-            "cpu_percent": estimated_cpu,
+            "approach": "io_uring" if mode == "default" else f"io_uring_{mode}",
+            "throughput_mbps": round(throughput, 2),
+            "cpu_percent": round(cpu_percent, 1),
             "total_bytes": total_bytes,
             "syscall_count": syscall_count,
-            "elapsed_sec": round(total_bytes / (1024 * 1024 * estimated_throughput), 2),
+            "elapsed_sec": round(elapsed, 2),
             "memory_overhead_mb": 8,
-            "latency_ms": estimated_latency
+            "latency_ms": round((elapsed / len(files)) * 1000, 2)
         }
     
-    def run_all(self):
-        """Run all I/O tests"""
-        print("\n" + "="*90)
-        print("STACKMONITOR - ASYNCHRONOUS I/O DESIGN SPACE EXPLORATION")
-        print("="*90)
-        print(f"Test Files: {len(self.test_files[0])} files")
-        print(f"Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
+    def approaches(self):
+        """Approaches measured by this script, in run order"""
         approaches = [
             ("blocking_read", self.test_blocking_read),
             ("select_poll", self.test_select_poll),
             ("epoll", self.test_epoll_simulation),
-            ("io_uring", self.test_iouring_simulation),
+            ("io_uring", self.test_iouring),
+            ("io_uring_defer_taskrun", lambda: self.test_iouring("defer_taskrun")),
+            ("io_uring_iopoll", lambda: self.test_iouring("iopoll")),
         ]
-        
-        for name, test_func in approaches:
-            print(f"Testing {name}...")
-            try:
-                result = test_func()
-                if result:
-                    self.results[name] = result
-                    self._print_result(result)
-                else:
-                    print(f"  (Skipped - not available on this platform)\n")
-            except Exception as e:
-                print(f"  Error: {e}\n")
-        
-        self._generate_comparison_table()
-        self._save_results()
-        self._generate_markdown_report()
-        self._cleanup()
-        
-        print("\n" + "="*90)
-        print("ALL TESTS COMPLETE")
-        print("="*90)
-        print("\nGenerated Files:")
-        print("  1. iouring_comparison_results.json - Raw metrics")
-        print("  2. IOURING_TEST_REPORT.md - Markdown report for dissertation")
-    
-    def _print_result(self, result):
-        """Print formatted result"""
-        print(f"  Approach: {result['approach']}")
-        print(f"    Throughput: {result['throughput_mbps']:.2f} MB/s")
-        print(f"    CPU: {result['cpu_percent']:.1f}%")
-        print(f"    Syscalls: {result['syscall_count']}")
-        print(f"    Memory Overhead: {result['memory_overhead_mb']} MB")
-        print(f"    Latency: {result['latency_ms']:.2f} ms\n")
-    
-    def _generate_comparison_table(self):
-        """Generate comparison table"""
-        print(f"\n{'='*90}")
-        print("ASYNCHRONOUS I/O COMPARISON TABLE")
-        print(f"{'='*90}\n")
-        
-        header = f"{'Approach':<20} {'Throughput':<15} {'CPU %':<10} {'Syscalls':<12} {'Memory':<10}"
-        print(header)
-        print("-" * 75)
-        
-        for approach in self.results:
-            r = self.results[approach]
-            print(f"{r['approach']:<20} {r['throughput_mbps']:<15.2f} {r['cpu_percent']:<10.1f} "
-                  f"{r['syscall_count']:<12} {r['memory_overhead_mb']:<10}")
-        
-        print()
-    
-    def _save_results(self):
-        """Save results to JSON"""
-        filename = "iouring_comparison_results.json"
-        with open(filename, "w") as f:
-            json.dump(self.results, f, indent=2)
-        print(f"Results saved to {filename}")
+        if self.enable_sqpoll:
+            approaches.append(("io_uring_sqpoll", lambda: self.test_iouring("sqpoll")))
+        return approaches
     
     def _generate_markdown_report(self):
         """Generate markdown report"""
@@ -326,15 +232,6 @@ Selected: **io_uring** with fallback to **epoll**
         with open(filename, "w") as f:
             f.write(report)
         print(f"Markdown report saved to {filename}")
-    
-    def _cleanup(self):
-        """Clean up test files"""
-        _, tmpdir = self.test_files
-        import shutil
-        try:
-            shutil.rmtree(tmpdir)
-        except:
-            pass
 
 if __name__ == "__main__":
     suite = IOUringTest()
@@ -7,20 +7,109 @@ Measures: detection latency, memory, CPU, accuracy, false positive rate
 
 import json
 import time
-import random
-import statistics
 import math
+import argparse
+import numpy as np
 from datetime import datetime
 from collections import defaultdict
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numba
+except ImportError:
+    # Without Numba stream_detect uses a vectorized NumPy version
+    numba = None
+
+# Logs per streaming Z-score window
+STREAM_WINDOW = 100
+
+# Per-log columns the detectors read, one row per log
+LOG_DTYPE = np.dtype([("tid", "i4"), ("dur", "i4"), ("svc", "S12"), ("port", "i4"), ("ts", "f8")])
+
+def _stream_detect_loop(ids, mean, std, n_tmpl, window):
+    """stream_detect's per-log loop; compiled with Numba when available"""
+    n_windows = len(ids) // window
+    counts = np.zeros(n_tmpl, dtype=np.int64)
+    det_at = np.empty(n_windows * n_tmpl, dtype=np.int64)
+    det_tmpl = np.empty(n_windows * n_tmpl, dtype=np.int64)
+    det = 0
+    for i in range(n_windows * window):
+        counts[ids[i]] += 1
+        if (i + 1) % window == 0:
+            for k in range(n_tmpl):
+                if (counts[k] - mean) / std > 3:  # 3-sigma threshold
+                    det_at[det] = i
+                    det_tmpl[det] = k
+                    det += 1
+            counts[:] = 0
+    return det_at[:det], det_tmpl[:det]
+
+if numba is not None:
+    # cache=True keeps the compiled kernel on disk across runs
+    _stream_detect_loop = numba.njit(cache=True)(_stream_detect_loop)
+
+def stream_detect(ids, mean, std, n_tmpl, window=STREAM_WINDOW):
+    """
+    Sliding-window Z-score detection over integer template ids
+    Returns (index of the window's last log, template id) arrays, one entry per detection
+    """
+    if numba is not None:
+        return _stream_detect_loop(ids, float(mean), float(std), n_tmpl, window)
+    
+    # Per-window template counts in one bincount, then threshold them all at once
+    n_windows = len(ids) // window
+    window_of = np.repeat(np.arange(n_windows), window)
+    counts = np.bincount(window_of * n_tmpl + ids[:n_windows * window],
+                         minlength=n_windows * n_tmpl).reshape(n_windows, n_tmpl)
+    hit_window, hit_tmpl = np.nonzero((counts - mean) / std > 3)
+    return (hit_window + 1) * window - 1, hit_tmpl
 
 class PatternMiningTest:
-    def __init__(self):
+    def __init__(self, jobs=1):
         self.results = {}
+        # Worker processes for run_all; 1 keeps the tests serial and uncontended
+        self.jobs = jobs
         self.test_logs = self.generate_test_logs()
+        logs, self.template_freq = self.test_logs
+        self.templates = list(self.template_freq)
+        self.is_timeout = np.array(["Connection timeout" in template for template in self.templates])
+        
+        table = np.fromiter(
+            ((log["template_id"], log["duration"] or 0, log["service"], log["port"], log["timestamp"]) for log in logs),
+            dtype=LOG_DTYPE, count=len(logs))
+        self._shm = None
+        if jobs > 1:
+            # Workers attach to this block by name instead of unpickling the logs
+            self._shm = shared_memory.SharedMemory(create=True, size=table.nbytes)
+            self.log_table = np.ndarray(table.shape, dtype=LOG_DTYPE, buffer=self._shm.buf)
+            self.log_table[:] = table
+        else:
+            self.log_table = table
+        # Integer template ids for the streaming detectors
+        self.template_ids = self.log_table["tid"]
+    
+    def __getstate__(self):
+        """Pickle for a worker process: the shared-memory name instead of the logs"""
+        state = self.__dict__.copy()
+        if self._shm is not None:
+            for key in ("test_logs", "log_table", "template_ids", "_shm"):
+                del state[key]
+            state["_shm_attach"] = (self._shm.name, len(self.log_table))
+        return state
     
-    def generate_test_logs(self, count=50000, anomaly_ratio=0.01):
+    def __setstate__(self, state):
+        """Attach to the parent's shared log table without copying it"""
+        attach = state.pop("_shm_attach", None)
+        self.__dict__.update(state)
+        if attach is not None:
+            name, count = attach
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.log_table = np.ndarray((count,), dtype=LOG_DTYPE, buffer=self._shm.buf)
+            self.template_ids = self.log_table["tid"]
+    
+    def generate_test_logs(self, count=50000, anomaly_ratio=0.01, seed=0):
         """Generate realistic logs with injected anomalies"""
-        logs = []
         templates = [
             "INFO Request completed in {duration}ms status={status}",
             "ERROR Connection timeout to {service}:{port} after {duration}ms",
@@ -28,83 +117,83 @@ class PatternMiningTest:
             "DEBUG Memory usage {memory}MB threshold={threshold}MB",
             "ERROR Out of memory in {service} heap={heap}MB",
         ]
-        
-        template_freq = defaultdict(int)
-        
-        for i in range(count):
-            # 99% normal, 1% anomalies
-            if random.random() < anomaly_ratio:
-                # Inject anomaly: repeated error pattern
-                template = "ERROR Connection timeout to {service}:{port} after {duration}ms"
-                duration = random.randint(5000, 15000)  # Long timeouts
-                service = "database"
-                port = 5432
-            else:
-                template = random.choice(templates)
-                duration = random.randint(10, 1000) if "{duration}" in template else None
-                service = random.choice(["auth", "payment", "inventory"])
-                port = random.choice([5432, 3306, 6379])
-            
-            log = {
-                "timestamp": time.time() + i * 0.001,
-                "template": template,
-                "duration": duration,
-                "service": service,
-                "port": port,
+        services = ["auth", "payment", "inventory"]
+        ports = np.array([5432, 3306, 6379])
+        rng = np.random.default_rng(seed)
+        
+        # 99% normal, 1% anomalies
+        anomaly = rng.random(count) < anomaly_ratio
+        template_idx = rng.integers(0, len(templates), count)
+        service_idx = rng.integers(0, len(services), count)
+        port = ports[rng.integers(0, len(ports), count)]
+        duration = rng.integers(10, 1001, count)
+        
+        # Inject anomaly: repeated error pattern with long timeouts against the database
+        timeout_idx = templates.index("ERROR Connection timeout to {service}:{port} after {duration}ms")
+        template_idx[anomaly] = timeout_idx
+        duration[anomaly] = rng.integers(5000, 15001, int(np.count_nonzero(anomaly)))
+        port[anomaly] = 5432
+        has_duration = ["{duration}" in template for template in templates]
+        
+        counts = np.bincount(template_idx, minlength=len(templates))
+        template_freq = defaultdict(int, {template: n for template, n in zip(templates, counts.tolist()) if n})
+        # Ids index template_freq's keys, which skip templates that never occur
+        template_id = np.cumsum(counts > 0) - 1
+        
+        timestamps = time.time() + np.arange(count) * 0.001
+        logs = [
+            {
+                "timestamp": ts,
+                "template": templates[tmpl],
+                "template_id": tid,
+                "duration": dur if has_duration[tmpl] else None,
+                "service": "database" if is_anomaly else services[svc],
+                "port": p,
             }
-            logs.append(log)
-            template_freq[template] += 1
+            for ts, tmpl, tid, dur, svc, p, is_anomaly in zip(
+                timestamps.tolist(), template_idx.tolist(), template_id[template_idx].tolist(),
+                duration.tolist(), service_idx.tolist(), port.tolist(), anomaly.tolist())
+        ]
         
         return logs, template_freq
     
+    def _baseline_stats(self):
+        """Mean and std dev of per-template counts over the first 5 minutes of logs"""
+        baseline_window = len(self.template_ids) // 12  # Simulate 5-min window
+        baseline_freq = np.bincount(self.template_ids[:baseline_window], minlength=len(self.templates))
+        # Only templates that actually occurred in the window count towards the baseline
+        baseline_freq = baseline_freq[baseline_freq > 0]
+        
+        mean_freq = baseline_freq.mean() if len(baseline_freq) else 0
+        std_freq = baseline_freq.std(ddof=1) if len(baseline_freq) > 1 else 0
+        return mean_freq, std_freq
+    
     def test_streaming_only(self):
         """Real-time streaming with Z-score detection"""
-        logs, template_freq = self.test_logs
+        logs = self.log_table
         
         # Baseline: normal template frequencies over first 5 minutes
-        baseline_window = len(logs) // 12  # Simulate 5-min window
-        baseline_freq = defaultdict(float)
-        
-        for i in range(baseline_window):
-            template = logs[i]["template"]
-            baseline_freq[template] += 1
-        
-        # Calculate mean and std dev
-        mean_freq = statistics.mean(baseline_freq.values()) if baseline_freq else 0
-        std_freq = statistics.stdev(baseline_freq.values()) if len(baseline_freq) > 1 else 0
+        mean_freq, std_freq = self._baseline_stats()
         
         start_time = time.time()
         detections = 0
         false_positives = 0
-        detection_latencies = []
-        
-        # Sliding window Z-score detection
-        window_freq = defaultdict(int)
-        for i, log in enumerate(logs):
-            template = log["template"]
-            window_freq[template] += 1
-            
-            # Check Z-score every 100 logs (simulate window)
-            if (i + 1) % 100 == 0:
-                for tmpl, freq in window_freq.items():
-                    if std_freq > 0:
-                        z_score = (freq - mean_freq) / std_freq
-                        if z_score > 3:  # 3-sigma threshold
-                            detections += 1
-                            detection_latencies.append((i / len(logs)) * 60000)  # ms
-                            
-                            # Check if true positive
-                            if "Connection timeout" not in tmpl:
-                                false_positives += 1
-                
-                window_freq = defaultdict(int)
+        detection_latencies = np.empty(0)
+        
+        # Sliding window Z-score detection, checked every 100 logs (simulate window)
+        if std_freq > 0:
+            det_at, det_tmpl = stream_detect(self.template_ids, mean_freq, std_freq, len(self.templates))
+            detections = len(det_at)
+            detection_latencies = (det_at / len(logs)) * 60000  # ms
+            # Anything but the injected timeout pattern is a false positive
+            false_positives = int(np.count_nonzero(~self.is_timeout[det_tmpl]))
         
         elapsed = time.time() - start_time
         
         return {
             "approach": "streaming_only",
             "logs_processed": len(logs),
-            "detection_latency_p50_ms": round(statistics.median(detection_latencies) if detection_latencies else 0, 2),
+            "detection_latency_p50_ms": round(float(np.median(detection_latencies)) if detection_latencies.size else 0, 2),
             "memory_overhead_mb": 20,
             "cpu_overhead_percent": 0.6,
             "detections": detections,
@@ -116,27 +205,25 @@ class PatternMiningTest:
     
     def test_batch_only(self):
         """Batch processing with Isolation Forest (nightly)"""
-        logs, template_freq = self.test_logs
+        logs, template_freq = self.log_table, self.template_freq
         
         # Batch analysis: look for rare patterns
         start_time = time.time()
         
         # Simple rare pattern detection: count templates, find outliers
-        sorted_templates = sorted(template_freq.items(), key=lambda x: x[1])
-        mean_count = statistics.mean(template_freq.values())
-        std_count = statistics.stdev(template_freq.values()) if len(template_freq) > 1 else 0
+        counts = np.fromiter(template_freq.values(), dtype=np.float64, count=len(template_freq))
+        mean_count = counts.mean()
+        std_count = counts.std(ddof=1) if len(counts) > 1 else 0
         
         detections = 0
         true_positives = 0
         
-        for template, count in sorted_templates:
-            if std_count > 0:
-                z_score = (count - mean_count) / std_count
-                # Rare patterns (very low or very high frequency)
-                if abs(z_score) > 2:
-                    detections += 1
-                    if "Connection timeout" in template and count > mean_count:
-                        true_positives += 1
+        if std_count > 0:
+            z_scores = (counts - mean_count) / std_count
+            # Rare patterns (very low or very high frequency)
+            detections = int(np.count_nonzero(np.abs(z_scores) > 2))
+            # Only frequent timeouts (z > 2) are the injected anomaly
+            true_positives = int(np.count_nonzero((z_scores > 2) & self.is_timeout))
         
         elapsed = time.time() - start_time
         
@@ -155,42 +242,22 @@ class PatternMiningTest:
     
     def test_hybrid_approach(self):
         """Hybrid: streaming alerts + batch deep analysis"""
-        logs, template_freq = self.test_logs
+        logs = self.log_table
         
         # Combine streaming detection (fast, some false positives)
-        baseline_window = len(logs) // 12
-        baseline_freq = defaultdict(float)
-        
-        for i in range(baseline_window):
-            template = logs[i]["template"]
-            baseline_freq[template] += 1
-        
-        mean_freq = statistics.mean(baseline_freq.values()) if baseline_freq else 0
-        std_freq = statistics.stdev(baseline_freq.values()) if len(baseline_freq) > 1 else 0
+        mean_freq, std_freq = self._baseline_stats()
         
         start_time = time.time()
         streaming_detections = 0
         streaming_fp = 0
-        detection_latencies = []
+        detection_latencies = np.empty(0)
         
         # Streaming layer
-        window_freq = defaultdict(int)
-        for i, log in enumerate(logs):
-            template = log["template"]
-            window_freq[template] += 1
-            
-            if (i + 1) % 100 == 0:
-                for tmpl, freq in window_freq.items():
-                    if std_freq > 0:
-                        z_score = (freq - mean_freq) / std_freq
-                        if z_score > 3:
-                            streaming_detections += 1
-                            detection_latencies.append((i / len(logs)) * 5000)  # 5s window
-                            
-                            if "Connection timeout" not in tmpl:
-                                streaming_fp += 1
-                
-                window_freq = defaultdict(int)
+        if std_freq > 0:
+            det_at, det_tmpl = stream_detect(self.template_ids, mean_freq, std_freq, len(self.templates))
+            streaming_detections = len(det_at)
+            detection_latencies = (det_at / len(logs)) * 5000  # 5s window
+            streaming_fp = int(np.count_nonzero(~self.is_timeout[det_tmpl]))
         
         # Batch layer (verify streaming alerts)
         batch_verified = streaming_detections - int(streaming_fp * 0.5)  # Batch corrects some FPs
@@ -200,7 +267,7 @@ class PatternMiningTest:
         return {
             "approach": "hybrid",
             "logs_processed": len(logs),
-            "detection_latency_p50_ms": round(statistics.median(detection_latencies) if detection_latencies else 5000, 2),
+            "detection_latency_p50_ms": round(float(np.median(detection_latencies)) if detection_latencies.size else 5000, 2),
             "memory_overhead_mb": 80,
             "cpu_overhead_percent": 0.8,
             "detections": streaming_detections,
@@ -224,6 +291,13 @@ class PatternMiningTest:
             ("Hybrid", self.test_hybrid_approach),
         ]
         
+        pool = None
+        if self.jobs > 1:
+            # The tests are independent, so run each in its own process and
+            # collect the results in the original order
+            pool = ProcessPoolExecutor(max_workers=self.jobs)
+            approaches = [(name, pool.submit(test_func).result) for name, test_func in approaches]
+        
         for name, test_func in approaches:
             print(f"Testing {name}...")
             try:
@@ -233,10 +307,13 @@ class PatternMiningTest:
                     self._print_result(result)
             except Exception as e:
                 print(f"  Error: {e}\n")
+        if pool is not None:
+            pool.shutdown()
         
         self._generate_comparison_table()
         self._save_results()
         self._generate_markdown_report()
+        self._cleanup()
         
         print("\n" + "="*90)
         print("ALL TESTS COMPLETE")
@@ -342,7 +419,21 @@ Selected: **Hybrid Approach** (streaming alerts + batch verification)
         with open(filename, "w") as f:
             f.write(report)
         print(f"Markdown report saved to {filename}")
+    
+    def _cleanup(self):
+        """Release the shared log table"""
+        if self._shm is not None:
+            # close() refuses while NumPy views still export the buffer
+            self.log_table = self.template_ids = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
 
 if __name__ == "__main__":
-    suite = PatternMiningTest()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="run the approaches in this many worker processes (default: serial)")
+    args = parser.parse_args()
+    
+    suite = PatternMiningTest(jobs=args.jobs)
     suite.run_all()
@@ -8,52 +8,81 @@ Measures: write throughput, query latency, storage efficiency, compression ratio
 import json
 import time
 import zlib
-import random
 import statistics
+import numpy as np
 from datetime import datetime
 
+try:
+    # C encoder, returns compact UTF-8 bytes
+    from orjson import dumps as encode_log
+except ImportError:
+    # Fallback: stdlib json with the same compact separators, encoded to bytes
+    def encode_log(log):
+        return json.dumps(log, separators=(",", ":")).encode('utf-8')
+
+# Logs joined per compressor call when streaming the test data
+STREAM_CHUNK_LOGS = 1000
+
 class StorageEngineTest:
     def __init__(self):
         self.results = {}
         self.test_logs = self.generate_test_logs()
+        self._compression = None
     
-    def generate_test_logs(self, count=100000):
+    def generate_test_logs(self, count=100000, seed=0):
         """Generate realistic 100MB of log data (similar to dissertation scenario)"""
-        logs = []
         services = ["auth", "payment", "inventory", "db", "cache"]
-        
-        for i in range(count):
-            log = {
-                "timestamp": f"2025-11-02T{i % 24:02d}:{(i // 60) % 60:02d}:{(i % 60):02d}Z",
-                "service": random.choice(services),
-                "level": random.choice(["DEBUG", "INFO", "WARN", "ERROR"]),
+        levels = ["DEBUG", "INFO", "WARN", "ERROR"]
+        rng = np.random.default_rng(seed)
+        
+        # The synthetic clock (i % 24, i // 60 % 60, i % 60) repeats every 3600
+        # logs, so format one cycle of timestamps and index into it
+        timestamps = [f"2025-11-02T{i % 24:02d}:{(i // 60) % 60:02d}:{(i % 60):02d}Z" for i in range(min(count, 3600))]
+        
+        # Draw every random column in one call each
+        service_idx = rng.integers(0, len(services), count)
+        level_idx = rng.integers(0, len(levels), count)
+        status_codes = rng.choice([200, 201, 400, 404, 500], count)
+        latencies = rng.integers(10, 5001, count)
+        user_ids = rng.integers(1000, 10000, count)
+        request_ids = rng.integers(100000, 1000000, count)
+        
+        return [
+            encode_log({
+                "timestamp": timestamps[i % 3600],
+                "service": services[service],
+                "level": levels[level],
                 "message": f"Log message {i} with some content that repeats",
-                "status_code": random.choice([200, 201, 400, 404, 500]),
-                "latency_ms": random.randint(10, 5000),
-                "user_id": random.randint(1000, 9999),
-                "request_id": f"req-{random.randint(100000, 999999)}"
-            }
-            logs.append(json.dumps(log).encode('utf-8'))
-        
-        return logs
+                "status_code": status,
+                "latency_ms": latency,
+                "user_id": user,
+                "request_id": f"req-{request}"
+            })
+            for i, (service, level, status, latency, user, request) in enumerate(zip(
+                service_idx.tolist(), level_idx.tolist(), status_codes.tolist(),
+                latencies.tolist(), user_ids.tolist(), request_ids.tolist()))
+        ]
     
     def test_compression_ratio(self):
         """Test actual compression with zlib (simulates different engines)"""
         logs = self.test_logs
-        raw_data = b"\n".join(logs)
-        raw_size = len(raw_data)
+        # Size of the newline-joined logs, without building that buffer
+        raw_size = sum(map(len, logs)) + len(logs) - 1
         
         # PostgreSQL: No compression (row-oriented)
         postgresql_size = raw_size
         
         # Elasticsearch: zlib compression (typical JSON storage)
-        compressed_elasticsearch = zlib.compress(raw_data, level=6)
-        elasticsearch_size = len(compressed_elasticsearch)
+        elasticsearch_size = self._stream_compressed_size(zlib.compressobj(level=6))
         elasticsearch_ratio = (1 - elasticsearch_size / raw_size) * 100
         
-        # ClickHouse: Aggressive zstd compression (simulated with zlib level 9)
-        compressed_clickhouse = zlib.compress(raw_data, level=9)
-        clickhouse_size = len(compressed_clickhouse)
+        # ClickHouse: zstd compression (CODEC(ZSTD) at zstd's default level 3)
+        try:
+            import zstandard as zstd
+            clickhouse_size = self._stream_compressed_size(zstd.ZstdCompressor(level=3).compressobj())
+        except ImportError:
+            # Fallback: simulate with zlib level 9
+            clickhouse_size = self._stream_compressed_size(zlib.compressobj(level=9))
         clickhouse_ratio = (1 - clickhouse_size / raw_size) * 100
         
         return {
@@ -65,6 +94,22 @@ class StorageEngineTest:
             "clickhouse_ratio": round(clickhouse_ratio, 2)
         }
     
+    def _stream_compressed_size(self, compressor):
+        """Compressed size of the newline-joined logs, fed to a compressobj in chunks"""
+        logs = self.test_logs
+        size = 0
+        for i in range(0, len(logs), STREAM_CHUNK_LOGS):
+            if i:
+                size += len(compressor.compress(b"\n"))
+            size += len(compressor.compress(b"\n".join(logs[i:i + STREAM_CHUNK_LOGS])))
+        return size + len(compressor.flush())
+    
+    def _get_compression(self):
+        """Return the compression sizes, computed once and shared by every engine test"""
+        if self._compression is None:
+            self._compression = self.test_compression_ratio()
+        return self._compression
+    
     def test_postgresql(self):
         """PostgreSQL row-oriented storage"""
         logs = self.test_logs
@@ -83,7 +128,7 @@ class StorageEngineTest:
         write_throughput = rows_written / write_time if write_time > 0 else 0
         
         # Storage: row-oriented, minimal compression
-        compression = self.test_compression_ratio()
+        compression = self._get_compression()
         storage_size = compression['postgresql_size']
         
         return {
@@ -118,7 +163,7 @@ class StorageEngineTest:
         write_throughput = len(logs) / write_time if write_time > 0 else 0
         
         # Storage: JSON compression (3-4x typical)
-        compression = self.test_compression_ratio()
+        compression = self._get_compression()
         storage_size = compression['elasticsearch_size']
         
         return {
@@ -153,7 +198,7 @@ class StorageEngineTest:
         write_throughput = len(logs) / write_time if write_time > 0 else 0
         
         # Storage: columnar compression (4-6x, here simulated as 5.5x)
-        compression = self.test_compression_ratio()
+        compression = self._get_compression()
         storage_size = compression['clickhouse_size']
         
         return {
@@ -235,15 +280,20 @@ class StorageEngineTest:
     def _save_results(self):
         """Save results to JSON"""
         filename = "storage_comparison_results.json"
-        with open(filename, "w") as f:
-            json.dump(self.results, f, indent=2)
+        try:
+            import orjson
+            with open(filename, "wb") as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2))
+        except ImportError:
+            with open(filename, "w") as f:
+                json.dump(self.results, f, indent=2)
         print(f"Results saved to {filename}")
     
     def _generate_markdown_report(self):
         """Generate markdown report"""
         filename = "STORAGE_TEST_REPORT.md"
         
-        report = f"""# Section 4.11 - Storage Engine Selection
+        parts = [f"""# Section 4.11 - Storage Engine Selection
 
 Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -256,19 +306,19 @@ Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 | Engine | Write Throughput | 7-day Storage | Compression | FT Query | TR Query |
 |---|---|---|---|---|---|
-"""
+"""]
         
         for engine in self.results:
             r = self.results[engine]
-            report += f"| {engine:<15} | {r['write_throughput_per_sec']:<16,} | {r['storage_gb_7day']:<13.2f} | {r['compression_ratio']:<12.2f} | {r['query_latency_fulltext_ms']:<9}ms | {r['query_latency_timerange_ms']:<9}ms |\n"
+            parts.append(f"| {engine:<15} | {r['write_throughput_per_sec']:<16,} | {r['storage_gb_7day']:<13.2f} | {r['compression_ratio']:<12.2f} | {r['query_latency_fulltext_ms']:<9}ms | {r['query_latency_timerange_ms']:<9}ms |\n")
         
-        report += """
+        parts.append("""
 ## Detailed Analysis
 
-"""
+""")
         for engine in self.results:
             r = self.results[engine]
-            report += f"""
+            parts.append(f"""
 ### {engine.upper()}
 - Write Throughput: {r['write_throughput_per_sec']:,} logs/sec
 - Write Latency: {r['write_latency_sec']:.2f}s
@@ -279,9 +329,9 @@ Test Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - Top-N Query: {r['query_latency_topn_ms']}ms
 - Lightweight Score: {r['lightweight_score']}/10
 
-"""
+""")
         
-        report += """
+        parts.append("""
 ## Cost Analysis (1,000 agents, 100GB/day)
 
 | Engine | Storage/day | Annual | Selection |
@@ -298,10 +348,10 @@ Selected: **ClickHouse (Columnar)**
 - 100K logs/sec write throughput
 - 61% cost reduction vs Elasticsearch
 - Exceptional for time-series log analysis
-"""
+""")
         
         with open(filename, "w") as f:
-            f.write(report)
+            f.write("".join(parts))
         print(f"Markdown report saved to {filename}")
 
 if __name__ == "__main__":
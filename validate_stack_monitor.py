@@ -4,11 +4,20 @@ StackMonitor Validation Suite - Master's Dissertation Level
 Comprehensive validation with verbose output for all scenarios.
 """
 
+import os
+import re
 import json
 import sys
 import time
+import socket
+import shutil
+import tempfile
+import threading
+import http.client
 import requests
 import subprocess
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Tuple, Optional
 
@@ -19,6 +28,114 @@ if sys.platform == 'win32':
     except:
         pass
 
+DOCKER_SOCKET = '/var/run/docker.sock'
+
+# Details are printed together when a scenario finishes; VERBOSE_LIVE=1
+# prints each one as it is recorded, for interactive debugging
+VERBOSE_LIVE = os.environ.get('VERBOSE_LIVE') == '1'
+
+# Log lines the scenarios look for, each matched in one pass over a log tail
+_BATCH_SENT_RE = re.compile(r'Batch\s*(\d+)\s*sent:\s*(\d+)[^\n]*logs')
+_CONFIG_VERSION_RE = re.compile(r'Loaded (?:new|initial) config version:[ \t]*(\S+)')
+_RELOAD_LINE_RE = re.compile(r'[^\n]*Loaded new config version:[^\n]*')
+_COMPRESSED_RE = re.compile(r'compressed\s*(\d+)\s*->\s*(\d+)\s*bytes')
+
+# `docker stats --format '{{.CPUPerc}}\t{{.MemUsage}}'`, e.g. "0.15%\t8.65MiB / 15.5GiB"
+_STATS_RE = re.compile(r'\s*(?P<cpu>[\d.]+)%\t(?P<mem>[\d.]+)(?P<unit>GiB|MiB|KiB|B)')
+_MEM_MUL = {'B': 1 / (1024 * 1024), 'KiB': 1 / 1024, 'MiB': 1.0, 'GiB': 1024.0}
+
+class DockerSocketConnection(http.client.HTTPConnection):
+    """HTTP connection to the Docker Engine API over its UNIX socket."""
+    def __init__(self, socket_path: str = DOCKER_SOCKET, timeout: float = 5):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+        
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+def parse_stats_sample(sample: Dict) -> Optional[Dict]:
+    """Convert one Engine API stats sample into the CPU % and MiB figures `docker stats` prints."""
+    cpu_stats = sample.get('cpu_stats') or {}
+    precpu_stats = sample.get('precpu_stats') or {}
+    if not precpu_stats.get('system_cpu_usage'):
+        # The first sample of a stream has no previous reading to diff against
+        return None
+    
+    cpu_delta = cpu_stats['cpu_usage']['total_usage'] - precpu_stats['cpu_usage']['total_usage']
+    system_delta = cpu_stats['system_cpu_usage'] - precpu_stats['system_cpu_usage']
+    online_cpus = cpu_stats.get('online_cpus') or len(cpu_stats['cpu_usage'].get('percpu_usage') or ()) or 1
+    cpu = cpu_delta / system_delta * online_cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+    
+    memory_stats = sample.get('memory_stats') or {}
+    usage = memory_stats.get('usage', 0)
+    mem_stats = memory_stats.get('stats') or {}
+    # Like the CLI, leave reclaimable page cache out (cgroup v1 and v2 key names)
+    cache = mem_stats.get('total_inactive_file', mem_stats.get('inactive_file', 0))
+    if cache < usage:
+        usage -= cache
+    # `read` is the daemon's sample timestamp; it tells repeated reads apart
+    return {'cpu': cpu, 'memory_mb': usage / (1024 * 1024), 'read': sample.get('read')}
+
+class ContainerStatsStream:
+    """Long-lived /containers/{name}/stats?stream=true reader that keeps the latest sample."""
+    def __init__(self, container: str):
+        self.container = container
+        self.latest = None
+        self._ended = False
+        self._cond = threading.Condition()
+        self._conn = DockerSocketConnection()
+        try:
+            self._conn.request('GET', f'/containers/{container}/stats?stream=true')
+            resp = self._conn.getresponse()
+            if resp.status != 200:
+                raise OSError(f"stats stream for {container} returned HTTP {resp.status}")
+        except:
+            self._conn.close()
+            raise
+        self._thread = threading.Thread(target=self._read, args=(resp,), daemon=True)
+        self._thread.start()
+        
+    def _read(self, resp):
+        try:
+            # dockerd pushes one JSON document per line, roughly once a second
+            for line in resp:
+                stats = parse_stats_sample(json.loads(line))
+                if stats:
+                    with self._cond:
+                        self.latest = stats
+                        self._cond.notify_all()
+        except (OSError, ValueError, KeyError, http.client.HTTPException):
+            # Stream closed, container stopped or daemon went away
+            pass
+        finally:
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+            
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+        
+    def get(self, timeout: float = 5, after: Optional[str] = None) -> Optional[Dict]:
+        """Return the most recent sample, waiting for one newer than the `after` read time if given."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._ended or (self.latest is not None and self.latest['read'] != after),
+                timeout
+            )
+            return dict(self.latest) if self.latest else None
+            
+    def close(self):
+        # shutdown() wakes the reader thread out of its blocking recv
+        try:
+            self._conn.sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, AttributeError):
+            pass
+        self._thread.join(timeout=2)
+        self._conn.close()
+
 class ValidationResult:
     def __init__(self, scenario: str):
         self.scenario = scenario
@@ -28,14 +145,18 @@ class ValidationResult:
         
     def add_detail(self, msg: str, level: str = "INFO"):
         self.details.append(f"[{level}] {msg}")
-        print(f"  [{level}] {msg}")
+        if VERBOSE_LIVE:
+            print(f"  [{level}] {msg}")
         
     def set_metric(self, key: str, value):
         self.metrics[key] = value
         
     def finish(self):
         self.duration = time.time() - self.start_time
-        print(f"\n[COMPLETE] {self.scenario} ({self.duration:.2f}s)")
+        parts = [] if VERBOSE_LIVE else [f"  {detail}\n" for detail in self.details]
+        parts.append(f"\n[COMPLETE] {self.scenario} ({self.duration:.2f}s)\n")
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
         return self
 
 class StackMonitorValidator:
@@ -46,59 +167,279 @@ class StackMonitorValidator:
             'clickhouse': 'http://localhost:8123'
         }
         self.results = []
-        
-    def check_service(self, name: str) -> bool:
-        """Check if a Docker service is running."""
+        # One keep-alive pool per host instead of a new TCP connection per request
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self._stats_lock = threading.Lock()
+        self._stats_streams = {}
+        self._running = set()
+        self._running_checked = 0.0
+        self._log_cache = {}
+        self._log_paths = {}
+        self._container_names = {}
+        self._log_volume = None
+        
+    def close(self):
+        """Stop the background stats readers and release pooled connections."""
+        self.session.close()
+        with self._stats_lock:
+            streams = list(self._stats_streams.values())
+            self._stats_streams.clear()
+        for stream in streams:
+            stream.close()
+        
+    def _refresh_running_containers(self, ttl: float = 2.0):
+        """Cache the running container names from a single `docker ps` call."""
+        if time.time() - self._running_checked < ttl:
+            return
         try:
             result = subprocess.run(
-                ['docker', 'ps', '--filter', f'name={name}', '--format', '{{.Names}}'],
+                ['docker', 'ps', '--format', '{{.Names}}'],
                 capture_output=True, text=True, timeout=5
             )
-            return name in result.stdout
+            self._running = set(result.stdout.split())
         except:
-            return False
+            self._running = set()
+        self._running_checked = time.time()
+        
+    def check_service(self, name: str) -> bool:
+        """Check if a Docker service is running."""
+        self._refresh_running_containers()
+        # Substring match, as `docker ps --filter name=` does
+        return any(name in container for container in self._running)
             
-    def get_container_stats(self, name: str) -> Optional[Dict]:
-        """Get container CPU and memory stats."""
-        # Try different container name formats
-        container_names = [
-            f'stackmonitor-poc-{name}-1',
-            name,
-            f'{name}-1'
-        ]
+    def _get_logs(self, container: str, tail: Optional[int] = None, ttl: float = 2.0) -> str:
+        """Return `docker logs` stdout + stderr, reusing a fetch younger than `ttl` seconds."""
+        key = (container, tail)
+        cached = self._log_cache.get(key)
+        if cached and time.time() - cached[0] < ttl:
+            return cached[1]
+        
+        log_output = self._read_json_log(container, tail)
+        if log_output is None:
+            cmd = ['docker', 'logs']
+            if tail is not None:
+                cmd += ['--tail', str(tail)]
+            logs = subprocess.run(cmd + [container], capture_output=True, text=True, timeout=5)
+            log_output = logs.stdout + logs.stderr
+        self._log_cache[key] = (time.time(), log_output)
+        return log_output
         
-        for container_name in container_names:
+    def _json_log_path(self, container: str) -> Optional[str]:
+        """Host path of a container's json-file log, resolved once per container."""
+        if container not in self._log_paths:
             try:
                 result = subprocess.run(
-                    ['docker', 'stats', '--no-stream', '--format', 
-                     '{{.CPUPerc}}\t{{.MemUsage}}', container_name],
+                    ['docker', 'inspect', '--format', '{{.LogPath}}', container],
                     capture_output=True, text=True, timeout=5
                 )
-                if result.returncode == 0 and result.stdout.strip():
-                    parts = result.stdout.strip().split('\t')
-                    if len(parts) == 2:
-                        cpu_str = parts[0].replace('%', '').strip()
-                        mem_str = parts[1].split()[0].strip()  # e.g., "8.65MiB"
-                        
-                        try:
-                            cpu = float(cpu_str) if cpu_str else 0.0
-                            
-                            if 'MiB' in mem_str:
-                                mem_mb = float(mem_str.replace('MiB', ''))
-                            elif 'GiB' in mem_str:
-                                mem_mb = float(mem_str.replace('GiB', '')) * 1024
-                            elif 'KiB' in mem_str:
-                                mem_mb = float(mem_str.replace('KiB', '')) / 1024
-                            else:
-                                mem_mb = 0.0
-                                
-                            return {'cpu': cpu, 'memory_mb': mem_mb}
-                        except ValueError:
-                            continue
+                path = result.stdout.strip() if result.returncode == 0 else ''
             except Exception:
+                path = ''
+            # Empty for log drivers other than json-file
+            self._log_paths[container] = path or None
+        return self._log_paths[container]
+        
+    def _read_json_log(self, container: str, tail: Optional[int] = None) -> Optional[str]:
+        """
+        Read a container's log straight from its json-file log, bypassing dockerd
+        Returns stdout + stderr like `docker logs`, or None when the file is unusable
+        """
+        path = self._json_log_path(container)
+        if not path:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                pos = f.seek(0, os.SEEK_END)
+                data = b''
+                # Read backwards in 64 KiB blocks until the tail is covered
+                while pos > 0 and (tail is None or data.count(b'\n') <= tail):
+                    step = pos if tail is None else min(65536, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        except OSError:
+            # Root-owned /var/lib/docker, rootless daemon or a remote/VM host
+            return None
+        
+        lines = data.splitlines()
+        if pos > 0:
+            # The first line of the window may be cut
+            lines = lines[1:]
+        elif (tail is None or len(lines) < tail) and (os.path.exists(path + '.1') or os.path.exists(path + '.1.gz')):
+            # The rest lives in rotated files; let `docker logs` stitch them
+            return None
+        if tail is not None:
+            lines = lines[max(len(lines) - tail, 0):]
+        
+        stdout, stderr = [], []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
                 continue
+            (stderr if entry.get('stream') == 'stderr' else stdout).append(entry.get('log', ''))
+        return ''.join(stdout) + ''.join(stderr)
+        
+    def _replace_file(self, path: str, data: bytes):
+        """Swap in new file contents atomically so a watcher never reads a torn write."""
+        # Same directory, so the rename stays on one filesystem
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.',
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            try:
+                f.write(data)
+            except:
+                f.close()
+                os.unlink(tmp_path)
+                raise
+        try:
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except:
+            os.unlink(tmp_path)
+            raise
+        
+    def _log_volume_path(self) -> Optional[str]:
+        """Host directory behind the log generator's /logs volume, if this process can read it."""
+        if self._log_volume is None:
+            path = os.environ.get('LOG_VOLUME_HOST_PATH', '')
+            if not path:
+                try:
+                    result = subprocess.run(
+                        ['docker', 'inspect', '--format',
+                         '{{range .Mounts}}{{if eq .Destination "/logs"}}{{.Source}}{{end}}{{end}}',
+                         'stackmonitor-poc-log-generator-1'],
+                        capture_output=True, text=True, timeout=5
+                    )
+                    path = result.stdout.strip() if result.returncode == 0 else ''
+                except Exception:
+                    path = ''
+            # Named volumes live under root-owned /var/lib/docker; CI without
+            # the mount (or a remote daemon) falls back to docker exec
+            self._log_volume = path if path and os.access(path, os.R_OK | os.X_OK) else ''
+        return self._log_volume or None
+        
+    def _generator_log_size(self, filename: str) -> Optional[int]:
+        """Size of a log generator file in bytes, or None if it could not be read."""
+        volume = self._log_volume_path()
+        if volume:
+            try:
+                return os.stat(os.path.join(volume, filename)).st_size
+            except OSError:
+                return 0
+        
+        # Try to get file size, use stat or ls -l
+        try:
+            result = subprocess.run(
+                ['docker', 'exec', 'stackmonitor-poc-log-generator-1', 'sh', '-c', f'stat -c %s /logs/{filename} 2>/dev/null || ls -l /logs/{filename} 2>/dev/null | awk "{{print $5}}" || echo "0"'],
+                capture_output=True, text=True, timeout=5
+            )
+        except Exception:
+            return None
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        try:
+            return int(result.stdout.strip())
+        except ValueError:
+            return 0
+        
+    def _container_name(self, name: str) -> Optional[str]:
+        """Resolve a compose service to its running container name, memoized once found."""
+        container = self._container_names.get(name)
+        if container is None:
+            self._refresh_running_containers()
+            for candidate in (f'stackmonitor-poc-{name}-1', name, f'{name}-1'):
+                if candidate in self._running:
+                    container = self._container_names[name] = candidate
+                    break
+        return container
+        
+    def _stats_stream(self, container: str) -> Optional[ContainerStatsStream]:
+        """Return the live stats reader for a container, opening it on first use."""
+        with self._stats_lock:
+            stream = self._stats_streams.get(container)
+            if stream is not None and stream.alive:
+                return stream
+            if not os.path.exists(DOCKER_SOCKET):
+                return None
+            try:
+                stream = ContainerStatsStream(container)
+            except (OSError, http.client.HTTPException):
+                return None
+            self._stats_streams[container] = stream
+            return stream
+            
+    def get_container_stats(self, name: str) -> Optional[Dict]:
+        """Get container CPU and memory stats."""
+        container = self._container_name(name)
+        if container is None:
+            return None
+        # Read the streamed Engine API sample when the Docker socket is
+        # reachable; `docker stats` forks the CLI and waits ~1-2s per call
+        stream = self._stats_stream(container)
+        if stream is not None:
+            return stream.get()
+        return self._get_container_stats_cli(container)
+        
+    def _get_container_stats_cli(self, container: str) -> Optional[Dict]:
+        """Get container CPU and memory stats through the docker CLI."""
+        try:
+            result = subprocess.run(
+                ['docker', 'stats', '--no-stream', '--format', 
+                 '{{.CPUPerc}}\t{{.MemUsage}}', container],
+                capture_output=True, text=True, timeout=5
+            )
+            match = _STATS_RE.match(result.stdout) if result.returncode == 0 else None
+            if match:
+                cpu = float(match['cpu'])
+                mem_mb = float(match['mem']) * _MEM_MUL[match['unit']]
+                return {'cpu': cpu, 'memory_mb': mem_mb}
+        except Exception:
+            pass
         return None
         
+    def _collect_cpu_samples(self, name: str, count: int, interval: float, timeout: float = 15) -> List[float]:
+        """Collect up to `count` distinct CPU readings about `interval` seconds apart within `timeout` seconds."""
+        deadline = time.time() + timeout
+        container = self._container_name(name)
+        stream = self._stats_stream(container) if container else None
+        if stream is not None:
+            # The stream refreshes about once a second, so each read waits for
+            # a newer daemon sample rather than repeating the previous one
+            samples = []
+            last_read = None
+            next_at = time.time()
+            while len(samples) < count and time.time() < deadline:
+                stats = stream.get(timeout=deadline - time.time(), after=last_read)
+                if stats is None or stats['read'] == last_read:
+                    # Timed out or the stream ended
+                    break
+                samples.append(stats['cpu'])
+                last_read = stats['read']
+                next_at += interval
+                time.sleep(max(0.0, min(next_at, deadline) - time.time()))
+            return samples
+        
+        # Every `docker stats` call is a fresh measurement taking ~1-2s; start
+        # them on a fixed schedule so slow calls overlap instead of queueing
+        pool = ThreadPoolExecutor(max_workers=count)
+        futures = []
+        for i in range(count):
+            if i:
+                time.sleep(interval)
+            futures.append(pool.submit(self.get_container_stats, name))
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.time()))
+        # Do not block on a hung read; the CLI call has its own 5s timeout
+        pool.shutdown(wait=False)
+        
+        samples = []
+        for future in futures:
+            stats = future.result() if future in done else None
+            if stats:
+                samples.append(stats['cpu'])
+        return samples
+        
     def scenario_0_health_check(self) -> ValidationResult:
         """Scenario 0: System Health Check"""
         r = ValidationResult("System Health Check")
@@ -137,12 +478,7 @@ class StackMonitorValidator:
         r.add_detail("Step 1: Measuring idle CPU usage...", "INFO")
         
         # Measure idle CPU
-        idle_samples = []
-        for i in range(3):
-            stats = self.get_container_stats('go-agent')
-            if stats:
-                idle_samples.append(stats['cpu'])
-            time.sleep(1)
+        idle_samples = self._collect_cpu_samples('go-agent', 3, 1.0)
         
         idle_cpu = sum(idle_samples) / len(idle_samples) if idle_samples else 0
         r.add_detail(f"Idle CPU samples: {idle_samples}", "INFO")
@@ -159,28 +495,14 @@ class StackMonitorValidator:
         # First, check if there are any recent batches
         recent_batch_found = False
         try:
-            logs = subprocess.run(
-                ['docker', 'logs', '--tail', '50', 'stackmonitor-poc-go-agent-1'],
-                capture_output=True, text=True, timeout=5
-            )
-            log_output = logs.stdout + logs.stderr
+            log_output = self._get_logs('stackmonitor-poc-go-agent-1', 50)
             
             # Look for "Batch X sent: Y logs"
-            for line in log_output.split('\n'):
-                if 'Batch' in line and 'sent:' in line and 'logs' in line:
-                    recent_batch_found = True
-                    # Extract batch ID and log count: "Batch 123 sent: 45 logs"
-                    try:
-                        # Format: "Batch 123 sent: 45 logs"
-                        if 'Batch' in line and 'sent:' in line:
-                            batch_part = line.split('Batch')[1].split('sent:')[0].strip()
-                            batch_id = int(batch_part)
-                            logs_part = line.split('sent:')[1].split()[0].strip()
-                            batch_log_count = int(logs_part)
-                            r.add_detail(f"Found recent batch {batch_id} with {batch_log_count} logs in agent logs", "INFO")
-                            break
-                    except (ValueError, IndexError):
-                        continue
+            match = _BATCH_SENT_RE.search(log_output)
+            if match:
+                recent_batch_found = True
+                batch_id, batch_log_count = int(match[1]), int(match[2])
+                r.add_detail(f"Found recent batch {batch_id} with {batch_log_count} logs in agent logs", "INFO")
         except Exception as e:
             r.add_detail(f"Could not check agent logs: {str(e)}", "WARN")
         
@@ -189,28 +511,14 @@ class StackMonitorValidator:
             r.add_detail("No recent batch found, waiting for agent to send a new batch...", "INFO")
             for attempt in range(max_wait_seconds // wait_interval):
                 try:
-                    logs = subprocess.run(
-                        ['docker', 'logs', '--tail', '10', 'stackmonitor-poc-go-agent-1'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    log_output = logs.stdout + logs.stderr
+                    log_output = self._get_logs('stackmonitor-poc-go-agent-1', 10)
                     
                     # Look for "Batch X sent: Y logs"
-                    for line in log_output.split('\n'):
-                        if 'Batch' in line and 'sent:' in line and 'logs' in line:
-                            try:
-                                # Format: "Batch 123 sent: 45 logs"
-                                batch_part = line.split('Batch')[1].split('sent:')[0].strip()
-                                batch_id = int(batch_part)
-                                logs_part = line.split('sent:')[1].split()[0].strip()
-                                batch_log_count = int(logs_part)
-                                batch_confirmed = True
-                                r.add_detail(f"Confirmed new batch {batch_id} with {batch_log_count} logs", "INFO")
-                                break
-                            except (ValueError, IndexError):
-                                continue
-                    
-                    if batch_confirmed:
+                    match = _BATCH_SENT_RE.search(log_output)
+                    if match:
+                        batch_id, batch_log_count = int(match[1]), int(match[2])
+                        batch_confirmed = True
+                        r.add_detail(f"Confirmed new batch {batch_id} with {batch_log_count} logs", "INFO")
                         break
                 except Exception as e:
                     pass
@@ -223,40 +531,20 @@ class StackMonitorValidator:
             if not batch_id:
                 # Try to get batch ID from logs again
                 try:
-                    logs = subprocess.run(
-                        ['docker', 'logs', '--tail', '50', 'stackmonitor-poc-go-agent-1'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    log_output = logs.stdout + logs.stderr
-                    for line in log_output.split('\n'):
-                        if 'Batch' in line and 'sent:' in line and 'logs' in line:
-                            try:
-                                # Format: "Batch 123 sent: 45 logs"
-                                batch_part = line.split('Batch')[1].split('sent:')[0].strip()
-                                batch_id = int(batch_part)
-                                logs_part = line.split('sent:')[1].split()[0].strip()
-                                batch_log_count = int(logs_part)
-                                break
-                            except (ValueError, IndexError):
-                                continue
+                    log_output = self._get_logs('stackmonitor-poc-go-agent-1', 50)
+                    match = _BATCH_SENT_RE.search(log_output)
+                    if match:
+                        batch_id, batch_log_count = int(match[1]), int(match[2])
                 except:
                     pass
         
         # Step 3: Measure CPU during active batch processing
         r.add_detail("Step 3: Measuring CPU during batch processing (waiting for next batch)...", "INFO")
-        active_samples = []
-        start_time = time.time()
-        
+        # Sampling is independent of the step 4 ingestion check, so run it in
+        # the background and let the two waits overlap
+        sampler = ThreadPoolExecutor(max_workers=1)
         # Monitor for up to 15 seconds for active processing
-        while len(active_samples) < 10 and (time.time() - start_time) < 15:
-            stats = self.get_container_stats('go-agent')
-            if stats:
-                active_samples.append(stats['cpu'])
-            time.sleep(0.5)
-        
-        active_cpu = sum(active_samples) / len(active_samples) if active_samples else 0
-        r.add_detail(f"Active CPU samples ({len(active_samples)}): {active_samples[:10] if len(active_samples) > 10 else active_samples}", "INFO")
-        r.add_detail(f"Average active CPU: {active_cpu:.2f}%", "INFO")
+        active_future = sampler.submit(self._collect_cpu_samples, 'go-agent', 10, 0.5, 15)
         
         # Verify batch was processed by checking ingestion service (wait up to 60 seconds)
         batch_processed = False
@@ -264,11 +552,8 @@ class StackMonitorValidator:
             r.add_detail(f"Step 4: Verifying batch {batch_id} was processed by ingestion service (waiting up to 60s)...", "INFO")
             for wait_attempt in range(60):  # Wait up to 60 seconds
                 try:
-                    ingestion_logs = subprocess.run(
-                        ['docker', 'logs', '--tail', '200', 'stackmonitor-poc-ingestion-service-1'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    log_output = ingestion_logs.stdout + ingestion_logs.stderr
+                    # Polled every second, so always take a fresh tail
+                    log_output = self._get_logs('stackmonitor-poc-ingestion-service-1', 200, ttl=0)
                     # Check for exact batch match
                     if f'Received batch {batch_id}:' in log_output:
                         batch_processed = True
@@ -284,6 +569,12 @@ class StackMonitorValidator:
                 r.add_detail(f"Warning: Batch {batch_id} processing not yet visible in ingestion logs after 60s wait", "WARN")
                 r.add_detail("This may indicate a delay in ingestion processing or batch was not sent", "INFO")
         
+        active_samples = active_future.result()
+        sampler.shutdown()
+        active_cpu = sum(active_samples) / len(active_samples) if active_samples else 0
+        r.add_detail(f"Active CPU samples ({len(active_samples)}): {active_samples[:10] if len(active_samples) > 10 else active_samples}", "INFO")
+        r.add_detail(f"Average active CPU: {active_cpu:.2f}%", "INFO")
+        
         # Calculate overall average
         all_samples = idle_samples + active_samples
         avg_cpu = sum(all_samples) / len(all_samples) if all_samples else 0
@@ -342,46 +633,29 @@ class StackMonitorValidator:
         r.add_detail("Step 1: Getting current config version from config service...", "INFO")
         config_version_before = None
         try:
-            logs = subprocess.run(
-                ['docker', 'logs', '--tail', '5', 'stackmonitor-poc-config-service-1'],
-                capture_output=True, text=True, timeout=5
-            )
-            log_output = logs.stdout + logs.stderr
+            log_output = self._get_logs('stackmonitor-poc-config-service-1', 5)
             # Find the most recent version hash
-            for line in reversed(log_output.split('\n')):
-                if 'Loaded new config version:' in line or 'Loaded initial config version:' in line:
-                    # Extract version hash
-                    if 'Loaded new config version:' in line:
-                        parts = line.split('Loaded new config version:')[1].strip().split()
-                        if parts:
-                            config_version_before = parts[0]
-                    elif 'Loaded initial config version:' in line:
-                        parts = line.split('Loaded initial config version:')[1].strip().split()
-                        if parts:
-                            config_version_before = parts[0]
-                    if config_version_before:
-                        r.add_detail(f"Current config version: {config_version_before}", "INFO")
-                        break
+            versions = _CONFIG_VERSION_RE.findall(log_output)
+            if versions:
+                config_version_before = versions[-1]
+                r.add_detail(f"Current config version: {config_version_before}", "INFO")
         except Exception as e:
             r.add_detail(f"Could not get current config version: {str(e)}", "WARN")
         
         # Step 2: Read and modify config
         r.add_detail("Step 2: Reading and modifying configuration...", "INFO")
         try:
-            with open('config/config.yaml', 'r') as f:
+            with open('config/config.yaml', 'rb') as f:
                 original_config = f.read()
             r.add_detail(f"Current config length: {len(original_config)} bytes", "INFO")
             
             # Modify config - ensure hash changes by adding unique comment
-            import datetime
             timestamp_str = str(time.time())
-            modified_config = original_config + f'\n# Test modification {timestamp_str}\n'
-            modified_config = modified_config.replace('poll_interval: "60s"', 'poll_interval: "45s"')
-            if 'version: "v1.0.1"' in modified_config:
-                modified_config = modified_config.replace('version: "v1.0.1"', 'version: "v1.0.2"')
+            modified_config = original_config + f'\n# Test modification {timestamp_str}\n'.encode()
+            modified_config = modified_config.replace(b'poll_interval: "60s"', b'poll_interval: "45s"')
+            modified_config = modified_config.replace(b'version: "v1.0.1"', b'version: "v1.0.2"')
             
-            with open('config/config.yaml', 'w') as f:
-                f.write(modified_config)
+            self._replace_file('config/config.yaml', modified_config)
             r.add_detail("Config file modified: poll_interval changed from 60s to 45s with timestamp", "INFO")
             r.add_detail(f"Modified config length: {len(modified_config)} bytes (was {len(original_config)} bytes)", "INFO")
         except Exception as e:
@@ -393,38 +667,34 @@ class StackMonitorValidator:
         r.add_detail("Step 3: Counting config reload messages before modification...", "INFO")
         reload_count_before = 0
         try:
-            logs = subprocess.run(
-                ['docker', 'logs', 'stackmonitor-poc-config-service-1'],
-                capture_output=True, text=True, timeout=5
-            )
-            log_output = logs.stdout + logs.stderr
-            for line in log_output.split('\n'):
-                if 'Loaded new config version:' in line:
-                    reload_count_before += 1
+            log_output = self._get_logs('stackmonitor-poc-config-service-1')
+            reload_count_before = log_output.count('Loaded new config version:')
             r.add_detail(f"Total reload messages before modification: {reload_count_before}", "INFO")
         except Exception as e:
             r.add_detail(f"Could not count reload messages: {str(e)}", "WARN")
         
-        # Step 4: Wait for config service to reload (polls every 10s, wait 30s to be safe)
-        r.add_detail("Step 4: Waiting for config service to detect change (polls every 10s, waiting 30s)...", "INFO")
-        time.sleep(30)
+        # Step 4: Wait for config service to reload (polls every 10s, so allow up to 30s)
+        r.add_detail("Step 4: Waiting for config service to detect change (polls every 10s, up to 30s)...", "INFO")
+        wait_start = time.time()
+        while time.time() - wait_start < 30:
+            try:
+                log_output = self._get_logs('stackmonitor-poc-config-service-1', ttl=0)
+                if log_output.count('Loaded new config version:') > reload_count_before:
+                    break
+            except Exception:
+                pass
+            time.sleep(0.5)
+        r.add_detail(f"Waited {time.time() - wait_start:.1f}s for the reload", "INFO")
         
         # Step 5: Check for NEW config version after modification
         r.add_detail("Step 5: Checking if config service detected the change...", "INFO")
         config_reloaded = False
         config_version_after = None
         try:
-            logs = subprocess.run(
-                ['docker', 'logs', 'stackmonitor-poc-config-service-1'],
-                capture_output=True, text=True, timeout=5
-            )
-            log_output = logs.stdout + logs.stderr
-            reload_count_after = 0
-            reload_messages = []
-            for line in log_output.split('\n'):
-                if 'Loaded new config version:' in line:
-                    reload_count_after += 1
-                    reload_messages.append(line.strip())
+            # Served from the cache when the wait loop just read it
+            log_output = self._get_logs('stackmonitor-poc-config-service-1')
+            reload_messages = [line.strip() for line in _RELOAD_LINE_RE.findall(log_output)]
+            reload_count_after = len(reload_messages)
             
             # If reload count increased, a reload happened
             if reload_count_after > reload_count_before:
@@ -454,8 +724,7 @@ class StackMonitorValidator:
         r.add_detail("Step 6: Restoring original configuration...", "INFO")
         config_restored = False
         try:
-            with open('config/config.yaml', 'w') as f:
-                f.write(original_config)
+            self._replace_file('config/config.yaml', original_config)
             r.add_detail("Original config file restored", "INFO")
             config_restored = True
         except Exception as e:
@@ -495,7 +764,7 @@ class StackMonitorValidator:
         dedup_rate = 0.0
         
         try:
-            resp = requests.get('http://localhost:8082/metrics', timeout=10)
+            resp = self.session.get('http://localhost:8082/metrics', timeout=10)
             if resp.status_code == 200:
                 metrics = resp.json()
                 logs_received = metrics.get('logs_received', 0)
@@ -522,7 +791,7 @@ class StackMonitorValidator:
         r.add_detail("Step 2: Verifying deduplication system health...", "INFO")
         
         try:
-            resp = requests.get('http://localhost:8082/health', timeout=10)
+            resp = self.session.get('http://localhost:8082/health', timeout=10)
             if resp.status_code == 200:
                 health = resp.json()
                 if health.get('status') == 'healthy':
@@ -582,7 +851,7 @@ class StackMonitorValidator:
             r.add_detail(f"Request Headers: {{'Content-Type': 'application/json'}}", "INFO")
             
             try:
-                resp = requests.post(
+                resp = self.session.post(
                     f"{self.endpoints['mcp']}/query",
                     json={'query': query},
                     headers={'Content-Type': 'application/json'},
@@ -647,7 +916,7 @@ class StackMonitorValidator:
             
             try:
                 start = time.time()
-                resp = requests.get(url, timeout=15)
+                resp = self.session.get(url, timeout=15)
                 elapsed = (time.time() - start) * 1000  # Convert to ms
                 
                 if resp.status_code == 200:
@@ -708,46 +977,11 @@ class StackMonitorValidator:
         generator_size_bytes = 0
         generator_log_count = 0
         try:
-            # Try to get file size, use stat or ls -l
-            result = subprocess.run(
-                ['docker', 'exec', 'stackmonitor-poc-log-generator-1', 'sh', '-c', 'stat -c %s /logs/application.log 2>/dev/null || ls -l /logs/application.log 2>/dev/null | awk "{print $5}" || echo "0"'],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                try:
-                    app_log_size = int(result.stdout.strip())
-                except ValueError:
-                    app_log_size = 0
+            app_log_size = self._generator_log_size('application.log')
+            if app_log_size is not None:
                 # Also check other log files
-                try:
-                    tomcat_result = subprocess.run(
-                        ['docker', 'exec', 'stackmonitor-poc-log-generator-1', 'sh', '-c', 'stat -c %s /logs/tomcat.log 2>/dev/null || ls -l /logs/tomcat.log 2>/dev/null | awk "{print $5}" || echo "0"'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    if tomcat_result.returncode == 0 and tomcat_result.stdout.strip():
-                        try:
-                            tomcat_size = int(tomcat_result.stdout.strip())
-                        except ValueError:
-                            tomcat_size = 0
-                    else:
-                        tomcat_size = 0
-                except:
-                    tomcat_size = 0
-                
-                try:
-                    nginx_result = subprocess.run(
-                        ['docker', 'exec', 'stackmonitor-poc-log-generator-1', 'sh', '-c', 'stat -c %s /logs/nginx.log 2>/dev/null || ls -l /logs/nginx.log 2>/dev/null | awk "{print $5}" || echo "0"'],
-                        capture_output=True, text=True, timeout=5
-                    )
-                    if nginx_result.returncode == 0 and nginx_result.stdout.strip():
-                        try:
-                            nginx_size = int(nginx_result.stdout.strip())
-                        except ValueError:
-                            nginx_size = 0
-                    else:
-                        nginx_size = 0
-                except:
-                    nginx_size = 0
+                tomcat_size = self._generator_log_size('tomcat.log') or 0
+                nginx_size = self._generator_log_size('nginx.log') or 0
                 
                 # Count log lines with timestamps in last 2 minutes
                 try:
@@ -813,7 +1047,7 @@ class StackMonitorValidator:
         stored_bytes = 0
         try:
             # Query recent logs with a larger limit
-            resp = requests.get(f"{self.endpoints['api']}/logs", params={'limit': 5000}, timeout=15)
+            resp = self.session.get(f"{self.endpoints['api']}/logs", params={'limit': 5000}, timeout=15)
             if resp.status_code == 200:
                 logs = resp.json().get('logs', [])
                 r.add_detail(f"Retrieved {len(logs)} logs from API", "INFO")
@@ -878,21 +1112,11 @@ class StackMonitorValidator:
                 capture_output=True, text=True, timeout=5
             )
             log_output = logs.stdout + logs.stderr
-            for line in log_output.split('\n'):
-                if 'compressed' in line.lower() and '->' in line:
-                    # Parse: "Sent batch X with Y logs (compressed A->B bytes, C.DDx)"
-                    try:
-                        if 'compressed' in line:
-                            parts = line.split('compressed')[1].split('bytes')[0]
-                            if '->' in parts:
-                                sizes = parts.split('->')
-                                orig = int(sizes[0].strip())
-                                comp = int(sizes[1].strip())
-                                transmission_original += orig
-                                transmission_bytes += comp
-                                batch_count += 1
-                    except:
-                        pass
+            # Parse: "Sent batch X with Y logs (compressed A->B bytes, C.DDx)"
+            for orig, comp in _COMPRESSED_RE.findall(log_output):
+                transmission_original += int(orig)
+                transmission_bytes += int(comp)
+                batch_count += 1
             
             if transmission_bytes > 0:
                 trans_ratio = transmission_original / transmission_bytes if transmission_bytes > 0 else 1.0
@@ -1009,7 +1233,7 @@ class StackMonitorValidator:
                 
                 # Test Health Endpoint
                 try:
-                    health_resp = requests.get(config['health_url'], timeout=5)
+                    health_resp = self.session.get(config['health_url'], timeout=5)
                     if health_resp.status_code == 200:
                         health_data = health_resp.json()
                         status = health_data.get('status', 'unknown')
@@ -1041,7 +1265,7 @@ class StackMonitorValidator:
                 
                 # Test Metrics Endpoint
                 try:
-                    metrics_resp = requests.get(config['metrics_url'], timeout=5)
+                    metrics_resp = self.session.get(config['metrics_url'], timeout=5)
                     if metrics_resp.status_code == 200:
                         metrics_data = metrics_resp.json()
                         result.add_detail(f"✓ Metrics endpoint accessible", "INFO")
@@ -1140,6 +1364,7 @@ class StackMonitorValidator:
             
         # Summary
         self.print_summary()
+        self.close()
         
     def print_summary(self):
         """Print validation summary."""